@@ -11,14 +11,14 @@ from sklearn.model_selection import train_test_split
 
 
 def add_weight_decay(net, l2_value, skip_list=()):
+    skip = frozenset(skip_list)
     decay, no_decay = [], []
     for name, param in net.named_parameters():
         if not param.requires_grad:
             continue  # frozen weights
-        if len(param.shape) == 1 or name.endswith(".bias") or name in skip_list:
-            no_decay.append(param)
-        else:
-            decay.append(param)
+        # ndim <= 1 also routes scalar parameters to the no-decay group
+        (no_decay if param.ndim <= 1 or name.endswith(".bias") or name in skip
+         else decay).append(param)
     return [{'params': no_decay, 'weight_decay': 0.}, {'params': decay, 'weight_decay': l2_value}]
 
 
@@ -67,13 +67,33 @@ class AdvReisz:
             self.adversary.apply(lambda m: (
                 m.reset_parameters() if hasattr(m, 'reset_parameters') else None))
 
+        self._eval_learner = None
+
         self.logger = logger
-        if self.logger is not None:
+        if self.logger is not None and getattr(self, 'writer', None) is None:
+            # one buffered writer per estimator, reused across fits; events are
+            # queued and flushed in bulk instead of hitting disk per write
             from torch.utils.tensorboard import SummaryWriter
-            self.writer = SummaryWriter()
+            self.writer = SummaryWriter(flush_secs=120, max_queue=1000)
 
         return X, Xval
 
+    def _checkpoint(self, name):
+        """ Stores the learner's weights only, rather than pickling the whole module. """
+        torch.save({k: v.detach().cpu() for k, v in self.learner.state_dict().items()},
+                   os.path.join(self.model_dir, name))
+
+    def _load_learner(self, name):
+        """ Returns a reusable learner template holding the parameters stored in
+        checkpoint `name`, so that modules are not re-instantiated per checkpoint.
+        """
+        if self._eval_learner is None:
+            self._eval_learner = copy.deepcopy(self.learner)
+            self._eval_learner.eval()
+        self._eval_learner.load_state_dict(torch.load(
+            os.path.join(self.model_dir, name), map_location='cpu'))
+        return self._eval_learner
+
     def _train(self, X, preprocess, *, Xval, preprocess_epochs, earlystop_rounds, store_test_every,
                learner_l2, adversary_l2, learner_lr, adversary_lr,
                n_epochs, bs, train_learner_every, train_adversary_every):
@@ -101,9 +121,14 @@ class AdvReisz:
 
                 if (it % train_learner_every == 0):
                     self.learner.train()
-                    D_loss = torch.mean(self.moment_fn(
-                        xb, self.adversary) - self.learner(xb) * self.adversary(xb))
-                    self.optimizerD.zero_grad()
+                    # the adversary is fixed in this step, so its moment and test
+                    # function values are plain per-batch constants; evaluating them
+                    # without a graph halves the backward cost of the learner step
+                    with torch.no_grad():
+                        moment = self.moment_fn(xb, self.adversary)
+                        test = self.adversary(xb)
+                    D_loss = torch.mean(moment - self.learner(xb) * test)
+                    self.optimizerD.zero_grad(set_to_none=True)
                     D_loss.backward()
                     self.optimizerD.step()
                     self.learner.eval()
@@ -111,23 +136,24 @@ class AdvReisz:
                 if (it % train_adversary_every == 0):
                     self.adversary.train()
                     test = self.adversary(xb)
+                    # the learner is fixed here, so its evaluation is detached
                     G_loss = - torch.mean(self.moment_fn(
-                        xb, self.adversary) - self.learner(xb) * test) + torch.mean(test**2)
-                    self.optimizerG.zero_grad()
+                        xb, self.adversary) - self.learner(xb).detach() * test) + torch.mean(test**2)
+                    self.optimizerG.zero_grad(set_to_none=True)
                     G_loss.backward()
                     self.optimizerG.step()
                     self.adversary.eval()
 
                 # if we are in preprocessing for earlystopping
                 if preprocess and (it % store_test_every == 0):
-                    self.momentval.append(self.moment_fn(
-                        Xval, self.adversary).cpu().detach().numpy().flatten())
-                    self.fval.append(self.adversary(
-                        Xval).cpu().detach().numpy().flatten())
+                    with torch.no_grad():
+                        self.momentval.append(self.moment_fn(
+                            Xval, self.adversary).cpu().numpy().flatten())
+                        self.fval.append(self.adversary(
+                            Xval).cpu().numpy().flatten())
 
             if not preprocess:  # if we are in normal training
-                torch.save(self.learner, os.path.join(
-                    self.model_dir, "epoch{}".format(epoch)))
+                self._checkpoint("epoch{}".format(epoch))
 
                 if Xval is not None:  # if early stopping was enabled we check the out of sample violation
                     ldev = self.learner(Xval).cpu().detach().numpy()
@@ -156,8 +182,7 @@ class AdvReisz:
             self.n_epochs = epoch + 1
             if Xval is not None:  # if we are in normal training after preprocessing
                 self.learner.load_state_dict(best_learner_state_dict)
-                torch.save(self.learner, os.path.join(
-                    self.model_dir, "earlystop"))
+                self._checkpoint("earlystop")
 
         return self
 
@@ -216,9 +241,8 @@ class AdvReisz:
                     learner_lr=learner_lr, adversary_lr=adversary_lr, n_epochs=n_epochs, bs=bs,
                     train_learner_every=train_learner_every, train_adversary_every=train_adversary_every)
 
-        if logger is not None:
+        if logger is not None:  # flush only, so the writer can be reused by later fits
             self.writer.flush()
-            self.writer.close()
 
         return self
 
@@ -239,8 +263,7 @@ class AdvReisz:
             T = torch.Tensor(T).to(self.device)
 
         if model == 'avg':
-            preds = np.array([torch.load(os.path.join(self.model_dir,
-                                                      "epoch{}".format(i)))(T).cpu().data.numpy()
+            preds = np.array([self._load_learner("epoch{}".format(i))(T).cpu().data.numpy()
                               for i in np.arange(burn_in, self.n_epochs)])
             if alpha is None:
                 return np.mean(preds, axis=0).flatten()
@@ -250,11 +273,8 @@ class AdvReisz:
                     np.percentile(preds, 100 * (1 - alpha / 2),
                                   axis=0).flatten()
         if model == 'final':
-            return torch.load(os.path.join(self.model_dir,
-                                           "epoch{}".format(self.n_epochs - 1)))(T).cpu().data.numpy().flatten()
+            return self._load_learner("epoch{}".format(self.n_epochs - 1))(T).cpu().data.numpy().flatten()
         if model == 'earlystop':
-            return torch.load(os.path.join(self.model_dir,
-                                           "earlystop"))(T).cpu().data.numpy().flatten()
+            return self._load_learner("earlystop")(T).cpu().data.numpy().flatten()
         if isinstance(model, int):
-            return torch.load(os.path.join(self.model_dir,
-                                           "epoch{}".format(model)))(T).cpu().data.numpy().flatten()
+            return self._load_learner("epoch{}".format(model))(T).cpu().data.numpy().flatten()
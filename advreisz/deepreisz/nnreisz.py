@@ -1,26 +1,36 @@
-import os
 import copy
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
 import numpy as np
 import tempfile
 import torch
 import torch.nn as nn
-from torch.utils.data import DataLoader, TensorDataset
 from torch import optim
 from .oadam import OAdam
 
 
 def add_weight_decay(net, l2_value, skip_list=()):
+    skip = frozenset(skip_list)
     decay, no_decay = [], []
     for name, param in net.named_parameters():
         if not param.requires_grad:
             continue  # frozen weights
-        if len(param.shape) == 1 or name.endswith(".bias") or name in skip_list:
-            no_decay.append(param)
-        else:
-            decay.append(param)
+        # ndim <= 1 also routes scalar parameters to the no-decay group
+        (no_decay if param.ndim <= 1 or name.endswith(".bias") or name in skip
+         else decay).append(param)
     return [{'params': no_decay, 'weight_decay': 0.}, {'params': decay, 'weight_decay': l2_value}]
 
 
+@torch.jit.script
+def _reisz_loss(m: torch.Tensor, a: torch.Tensor) -> torch.Tensor:
+    """ Mean of the reisz loss -2 * m(x; a) + a(x)^2; scripted so the elementwise
+    ops and the reduction fuse into a single kernel.
+    """
+    return (a * a - 2.0 * m).mean()
+
+
 class DeepReisz:
 
     def __init__(self, learner, moment_fn):
@@ -31,29 +41,43 @@ class DeepReisz:
         moment_fn : a function that takes as input a tuple (x, adversary) and
             evaluates the moment function at each of the x's, for a test function given by the adversary model.
             The adversary is a torch model that take as input x and return the output of the test function.
+            The function can optionally accept a keyword argument `a` containing the precomputed
+            output of the test function at x, i.e. adversary(x), so that the test function is not
+            re-evaluated at x if the moment function needs that value.
         """
         self.learner = learner
         self.moment_fn = moment_fn
+        # whether the moment_fn can re-use a precomputed evaluation of the test function at x
+        self._moment_accepts_a = 'a' in inspect.signature(
+            moment_fn).parameters
+
+    def _moment(self, x, test_fn, a=None):
+        """ Evaluates the moment function, forwarding the precomputed test function
+        value `a = test_fn(x)` if the moment function supports it.
+        """
+        if self._moment_accepts_a:
+            return self.moment_fn(x, test_fn, a=a)
+        return self.moment_fn(x, test_fn)
 
     def _pretrain(self, X, Xval, *, bs,
-                  warm_start, logger, model_dir, device, verbose):
+                  warm_start, logger, model_dir, device, verbose,
+                  compile_learner=True, data_on_device=True, distributed=False):
         """ Prepares the variables required to begin training.
         """
         self.verbose = verbose
 
-        if not os.path.exists(model_dir):
-            os.makedirs(model_dir)
+        model_dir = Path(model_dir)
+        model_dir.mkdir(parents=True, exist_ok=True)
         self.tempdir = tempfile.TemporaryDirectory(dir=model_dir)
-        self.model_dir = self.tempdir.name
+        self.model_dir = Path(self.tempdir.name)
         self.device = device
+        self._cuda = (device is not None) and (
+            torch.device(device).type == 'cuda')
 
         if not torch.is_tensor(X):
-            X = torch.Tensor(X).to(self.device)
+            X = self._to_training_device(torch.Tensor(X), data_on_device)
         if (Xval is not None) and (not torch.is_tensor(Xval)):
-            Xval = torch.Tensor(Xval).to(self.device)
-
-        self.train_ds = TensorDataset(X)
-        self.train_dl = DataLoader(self.train_ds, batch_size=bs, shuffle=True)
+            Xval = self._to_training_device(torch.Tensor(Xval), data_on_device)
 
         self.learner = self.learner.to(device)
 
@@ -61,54 +85,316 @@ class DeepReisz:
             self.learner.apply(lambda m: (
                 m.reset_parameters() if hasattr(m, 'reset_parameters') else None))
 
+        # optional multi-gpu data parallelism; torch.distributed must have been
+        # initialized by the caller and every rank must call fit with the same data
+        self._rank, self._world_size = 0, 1
+        self._ddp_learner = None
+        if distributed:
+            import torch.distributed as dist
+            from torch.nn.parallel import DistributedDataParallel as DDP
+            self._rank = dist.get_rank()
+            self._world_size = dist.get_world_size()
+            self._ddp_learner = DDP(self.learner,
+                                    device_ids=[self.device] if self._cuda else None,
+                                    gradient_as_bucket_view=True)
+
+        # compiled view of the learner for the hot training loop; shares parameters with
+        # self.learner, so all state_dict operations keep going through self.learner
+        forward_model = self._ddp_learner if distributed else self.learner
+        self._compiled_learner = forward_model
+        if compile_learner:
+            try:
+                self._compiled_learner = torch.compile(
+                    forward_model, mode='reduce-overhead', fullgraph=False)
+            except (AttributeError, RuntimeError):
+                try:
+                    self._compiled_learner = torch.jit.script(forward_model)
+                except Exception:
+                    pass
+
+        # background thread for serializing checkpoints without stalling training
+        self._ckpt_executor = ThreadPoolExecutor(max_workers=1)
+        self._pending_ckpts = []
+        self._eval_learner = None
+
         self.logger = logger
-        if self.logger is not None:
+        if self.logger is not None and getattr(self, 'writer', None) is None:
+            # one buffered writer per estimator, reused across fits; events are
+            # queued and flushed in bulk instead of hitting disk per write
             from torch.utils.tensorboard import SummaryWriter
-            self.writer = SummaryWriter()
+            self.writer = SummaryWriter(flush_secs=120, max_queue=1000)
 
         return X, Xval
 
+    def _checkpoint(self, path):
+        """ Snapshots the learner state_dict to cpu tensors and hands serialization
+        off to a background thread, so that the epoch loop is not blocked on disk io.
+        Under distributed training only rank 0 writes checkpoints; returns whether
+        a write was scheduled.
+        """
+        if self._rank != 0:
+            return False
+        on_cuda = False
+        cpu_state = {}
+        for k, v in self.learner.state_dict().items():
+            on_cuda = on_cuda or v.is_cuda
+            cpu_state[k] = v.detach().to('cpu', non_blocking=True)
+        if on_cuda:  # make sure the device-to-host copies have landed before serializing
+            torch.cuda.synchronize()
+        self._pending_ckpts.append(
+            self._ckpt_executor.submit(torch.save, cpu_state, path))
+        return True
+
+    def _wait_for_checkpoints(self):
+        for fut in self._pending_ckpts:
+            fut.result()
+        self._pending_ckpts = []
+
+    def _template_learner(self, state):
+        """ Returns a reusable learner template holding the given state_dict, so that
+        self.learner's own weights are never clobbered by evaluation.
+        """
+        if self._eval_learner is None:
+            # the deepcopy must happen outside inference mode (predict calls this
+            # from inside inference_mode blocks): inference-tensor parameters could
+            # never be updated in place by later load_state_dict calls
+            with torch.inference_mode(False):
+                self._eval_learner = copy.deepcopy(self.learner)
+            self._eval_learner.eval()
+        self._eval_learner.load_state_dict(state)
+        return self._eval_learner
+
+    def _epoch_file(self, epoch):
+        return self.model_dir / f"epoch{epoch}"
+
+    def _load_learner(self, epoch):
+        """ Returns a learner template holding the parameters checkpointed at `epoch`. """
+        if self._rank != 0:
+            raise RuntimeError(
+                "epoch checkpoints are only written on rank 0 under distributed "
+                "training; call predict with model='avg' or an epoch number on rank 0")
+        return self._template_learner(torch.load(
+            self._epoch_file(epoch), map_location='cpu'))
+
+    def _to_training_device(self, data, data_on_device):
+        """ Places freshly converted training data. On cuda the host copy is pinned
+        first so that the transfer (whole dataset, or later per-batch copies when
+        data_on_device=False) can run asynchronously.
+        """
+        if self._cuda:
+            data = data.pin_memory()
+            if data_on_device:
+                data = data.to(self.device, non_blocking=True)
+            return data
+        return data.to(self.device)
+
+    def _batches(self, X, bs, epoch):
+        """ Iterates over shuffled minibatches of X with a plain permutation gather.
+        X already lives in memory as a tensor, so this avoids the per-batch python
+        and collate overhead of a DataLoader. If X sits in (pinned) host memory
+        while training runs on cuda, batches are staged through two pinned buffers
+        and copied to the device asynchronously, overlapping transfer with compute.
+        Under distributed training every rank draws the same epoch-seeded
+        permutation and keeps its own interleaved shard of it.
+        """
+        n = X.shape[0]
+        if self._world_size > 1:
+            g = torch.Generator(device=X.device)
+            g.manual_seed(epoch)
+            perm = torch.randperm(n, generator=g, device=X.device)
+            perm = perm[self._rank::self._world_size]
+        else:
+            perm = torch.randperm(n, device=X.device)
+        m = perm.shape[0]
+        if X.is_cuda or not self._cuda:
+            for i in range(0, m, bs):
+                yield X.index_select(0, perm[i:i + bs])
+            return
+        # copies run on their own stream: enqueued on the compute stream they would
+        # execute in issue order and never overlap the previous batch's kernels
+        copy_stream = torch.cuda.Stream()
+        staging = [torch.empty((bs,) + X.shape[1:], pin_memory=True)
+                   for _ in range(2)]
+        events = [torch.cuda.Event() for _ in range(2)]
+        for it, i in enumerate(range(0, m, bs)):
+            b = it % 2
+            if it >= 2:  # the previous copy out of this buffer must have finished
+                events[b].synchronize()
+            idx = perm[i:i + bs]
+            out = staging[b][:idx.shape[0]]
+            torch.index_select(X, 0, idx, out=out)
+            with torch.cuda.stream(copy_stream):
+                xb = out.to(self.device, non_blocking=True)
+            events[b].record(copy_stream)
+            # the consumer's kernels must wait for the copy, and the allocator must
+            # not hand xb's memory back to the copy stream while compute reads it
+            torch.cuda.current_stream().wait_event(events[b])
+            xb.record_stream(torch.cuda.current_stream())
+            yield xb
+
+    def _snapshot_state(self, buffers=None):
+        """ Copies the learner state_dict into cpu-side buffers. On the first call
+        the buffers are allocated (pinned when training on cuda); subsequent calls
+        refresh them in place, avoiding the allocations of a deepcopy.
+        """
+        if buffers is None:
+            buffers = {k: torch.empty(v.shape, dtype=v.dtype, device='cpu',
+                                      pin_memory=self._cuda)
+                       for k, v in self.learner.state_dict().items()}
+        for k, v in self.learner.state_dict().items():
+            buffers[k].copy_(v, non_blocking=True)
+        return buffers
+
+    def _validation_loss(self, Xval, bs):
+        """ Out-of-sample reisz loss, evaluated in chunks of size bs without
+        building an autograd graph, so that peak memory stays bounded.
+        """
+        with torch.inference_mode():
+            total, n = 0., 0
+            for xv in torch.split(Xval, bs):
+                if self._cuda and not xv.is_cuda:
+                    xv = xv.to(self.device, non_blocking=True)
+                a_val = self._compiled_learner(xv)
+                total += _reisz_loss(self._moment(
+                    xv, self._compiled_learner, a=a_val), a_val).item() * xv.shape[0]
+                n += xv.shape[0]
+        return total / n
+
+    def _capture_train_step(self, static_xb):
+        """ Warms up and captures one training step (forward, backward, optimizer
+        update) on the persistent input buffer static_xb into a CUDA graph.
+        Replaying the graph re-runs the step on the current contents of static_xb
+        without any kernel launch overhead.
+        """
+        self.learner.train()
+        s = torch.cuda.Stream()
+        s.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(s):
+            for _ in range(3):
+                self.optimizerD.zero_grad(set_to_none=True)
+                a = self.learner(static_xb)
+                D_loss = _reisz_loss(self._moment(
+                    static_xb, self.learner, a=a), a)
+                D_loss.backward()
+                self.optimizerD.step()
+        torch.cuda.current_stream().wait_stream(s)
+        self.optimizerD.zero_grad(set_to_none=True)
+        graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(graph):
+            a = self.learner(static_xb)
+            D_loss = _reisz_loss(self._moment(
+                static_xb, self.learner, a=a), a)
+            D_loss.backward()
+            self.optimizerD.step()
+            self.optimizerD.zero_grad(set_to_none=True)
+        self.learner.eval()
+        return graph
+
     def _train(self, X, *, Xval,
                earlystop_rounds,
                learner_l2, learner_lr,
-               n_epochs, bs):
-
-        self.optimizerD = optim.Adam(add_weight_decay(self.learner, learner_l2),
-                                     lr=learner_lr)
+               n_epochs, bs, use_cuda_graph=False, mixed_precision=False,
+               amp_dtype='bfloat16', checkpoint_every=1, accumulate_grad_batches=1):
+
+        # the captured step runs the bare learner, bypassing DDP's gradient
+        # all-reduce, so the graph path is limited to single-process training
+        use_graph = (use_cuda_graph and torch.is_tensor(X) and X.is_cuda
+                     and accumulate_grad_batches == 1 and self._world_size == 1)
+        # the default gradient scaler is not capture-safe, so amp stays off
+        # inside the cuda graph path
+        use_amp = mixed_precision and self._cuda and not use_graph
+        amp_dtype = torch.bfloat16 if amp_dtype == 'bfloat16' else torch.float16
+        # bfloat16 keeps float32's exponent range, so only float16 needs the
+        # gradient scaler; when disabled, scale/step/update are passthroughs
+        try:
+            scaler = torch.amp.GradScaler(
+                'cuda', enabled=use_amp and amp_dtype is torch.float16)
+        except (AttributeError, TypeError):  # older pytorch without torch.amp.GradScaler
+            scaler = torch.cuda.amp.GradScaler(
+                enabled=use_amp and amp_dtype is torch.float16)
+        if use_graph:
+            # the optimizer state must live on device and be capture-safe
+            try:
+                self.optimizerD = optim.Adam(add_weight_decay(self.learner, learner_l2),
+                                             lr=learner_lr, capturable=True)
+            except TypeError:  # older pytorch without capturable adam
+                use_graph = False
+        if not use_graph:
+            try:
+                # the fused cuda kernel updates all parameters in one launch
+                self.optimizerD = optim.Adam(add_weight_decay(self.learner, learner_l2),
+                                             lr=learner_lr, fused=self._cuda)
+            except (TypeError, RuntimeError):  # older pytorch without fused adam
+                self.optimizerD = optim.Adam(add_weight_decay(self.learner, learner_l2),
+                                             lr=learner_lr)
+        graph, static_xb = None, None
+        self._saved_epochs = []
 
         if Xval is not None:  # if we are in normal training after preprocessing
             min_eval = np.inf
             time_since_last_improvement = 0
-            best_learner_state_dict = copy.deepcopy(self.learner.state_dict())
+            # preallocated cpu buffers for the best weights, refreshed in place on
+            # every improvement instead of deep-copying the state_dict
+            best_learner_state_dict = self._snapshot_state()
 
         for epoch in range(n_epochs):
 
             if self.verbose > 0:
                 print("Epoch #", epoch, sep="")
 
-            for it, (xb,) in enumerate(self.train_dl):
-
-                self.learner.train()
-                D_loss = torch.mean(- 2 * self.moment_fn(
-                    xb, self.learner) + self.learner(xb) ** 2)
-                self.optimizerD.zero_grad()
-                D_loss.backward()
-                self.optimizerD.step()
-                self.learner.eval()
-
-            torch.save(self.learner, os.path.join(
-                self.model_dir, "epoch{}".format(epoch)))
+            self.optimizerD.zero_grad(set_to_none=True)
+            for it, xb in enumerate(self._batches(X, bs, epoch)):
+
+                if use_graph and (xb.shape[0] == bs):
+                    if graph is None:
+                        # the warm-up iterations inside the capture train on this batch
+                        static_xb = xb.clone()
+                        graph = self._capture_train_step(static_xb)
+                    else:
+                        static_xb.copy_(xb, non_blocking=True)
+                        graph.replay()
+                    continue
+
+                # eager path: cpu training, trailing partial batches and un-capturable setups
+                step_now = ((it + 1) % accumulate_grad_batches == 0)
+                # skip the gradient all-reduce on micro-batches that don't step;
+                # DDP reads the sync flag at forward time, so the forward pass must
+                # run inside no_sync as well, not just the backward
+                sync_ctx = self._ddp_learner.no_sync \
+                    if (self._ddp_learner is not None) and not step_now else nullcontext
+                self._compiled_learner.train()
+                with sync_ctx():
+                    with torch.autocast(device_type='cuda' if self._cuda else 'cpu',
+                                        dtype=amp_dtype if use_amp else None,
+                                        enabled=use_amp):
+                        a = self._compiled_learner(xb)
+                        D_loss = _reisz_loss(self._moment(
+                            xb, self._compiled_learner, a=a), a) / accumulate_grad_batches
+                    scaler.scale(D_loss).backward()
+                if step_now:
+                    scaler.step(self.optimizerD)
+                    scaler.update()
+                    self.optimizerD.zero_grad(set_to_none=True)
+                self._compiled_learner.eval()
+
+            if (it + 1) % accumulate_grad_batches != 0:
+                # flush the gradients of the trailing micro-batches before validating
+                scaler.step(self.optimizerD)
+                scaler.update()
+                self.optimizerD.zero_grad(set_to_none=True)
+
+            if checkpoint_every and (epoch % checkpoint_every == 0):
+                if self._checkpoint(self._epoch_file(epoch)):
+                    self._saved_epochs.append(epoch)
 
             if Xval is not None:  # if early stopping was enabled we check the out of sample violation
-                self.curr_eval = np.mean(torch.mean(- 2 * self.moment_fn(
-                    Xval, self.learner) + self.learner(Xval) ** 2).cpu().detach().numpy())
+                self.curr_eval = self._validation_loss(Xval, bs)
                 if self.verbose > 0:
                     print("Validation loss:", self.curr_eval)
                 if min_eval > self.curr_eval:
                     min_eval = self.curr_eval
                     time_since_last_improvement = 0
-                    best_learner_state_dict = copy.deepcopy(
-                        self.learner.state_dict())
+                    self._snapshot_state(best_learner_state_dict)
                 else:
                     time_since_last_improvement += 1
                     if time_since_last_improvement > earlystop_rounds:
@@ -119,16 +405,23 @@ class DeepReisz:
 
         self.n_epochs = epoch + 1
         if Xval is not None:  # if we are in normal training after preprocessing
+            # keep the last epoch's weights in memory so that predict('final') needs
+            # neither a disk round-trip nor the checkpoint files
+            self._final_state = self._snapshot_state()
             self.learner.load_state_dict(best_learner_state_dict)
-            torch.save(self.learner, os.path.join(
-                self.model_dir, "earlystop"))
+        else:  # without early stopping self.learner already is the final model
+            self._final_state = None
+        self._wait_for_checkpoints()
 
         return self
 
     def fit(self, X, Xval=None, *, earlystop_rounds=20,
             learner_l2=1e-3, learner_lr=0.001,
             n_epochs=100, bs=100,
-            warm_start=False, logger=None, model_dir='.', device=None, verbose=0):
+            warm_start=False, logger=None, model_dir='.', device=None, verbose=0,
+            compile_learner=True, use_cuda_graph=False, data_on_device=True,
+            mixed_precision=False, amp_dtype='bfloat16', distributed=False,
+            checkpoint_every=1, accumulate_grad_batches=1):
         """
         Parameters
         ----------
@@ -146,18 +439,52 @@ class DeepReisz:
         model_dir : folder where to store the learned models after every epoch
         device : name of device on which to perform all computation
         verbose : whether to print messages related to progress of training
+        compile_learner : whether to compile the learner with torch.compile (falling back to
+            torch.jit.script on older pytorch versions) to reduce the per-iteration
+            dispatch overhead of the training loop
+        use_cuda_graph : whether to capture the training step into a CUDA graph and replay
+            it on every full batch, removing per-kernel launch overhead. Requires training
+            on a cuda device, a moment_fn that is capture-safe (no data-dependent control
+            flow or cpu synchronization) and is best combined with compile_learner=False,
+            since the captured step runs the eager learner. Ignored under
+            distributed=True, where the captured step would bypass DDP's gradient
+            all-reduce and let the ranks diverge
+        data_on_device : whether to move the whole training data to `device`. If False and
+            device is cuda, the data is kept in pinned host memory and minibatches are
+            copied to the device asynchronously; useful when X does not fit in device memory
+        mixed_precision : whether to run the training step under torch.autocast. Only
+            takes effect on cuda and outside the cuda graph path; the validation loss
+            is still evaluated in full precision
+        amp_dtype : one of ('bfloat16', 'float16'), the autocast dtype used when
+            mixed_precision is enabled. bfloat16 keeps float32's exponent range and
+            needs no gradient scaling; float16 trains with a GradScaler
+        distributed : whether to wrap the learner in DistributedDataParallel. Assumes
+            torch.distributed has been initialized externally and that every rank calls
+            fit with the same data; each rank trains on its own shard of every epoch's
+            batches and checkpoints are only written on rank 0
+        checkpoint_every : write the learner's weights to disk every checkpoint_every
+            epochs; 0 or None disables epoch checkpoints entirely. predict('avg') and
+            predict(epoch) only see the saved epochs, so leave this at 1 when model
+            averaging over all epochs is needed
+        accumulate_grad_batches : number of micro-batches over which to accumulate
+            gradients before taking an optimizer step, for an effective batch size of
+            accumulate_grad_batches * bs. Under distributed training the gradient
+            all-reduce is skipped on the intermediate micro-batches
         """
 
         X, Xval = self._pretrain(X, Xval, bs=bs, warm_start=warm_start, logger=logger, model_dir=model_dir,
-                                 device=device, verbose=verbose)
+                                 device=device, verbose=verbose, compile_learner=compile_learner,
+                                 data_on_device=data_on_device, distributed=distributed)
 
         self._train(X, Xval=Xval, earlystop_rounds=earlystop_rounds,
                     learner_l2=learner_l2,
-                    learner_lr=learner_lr, n_epochs=n_epochs, bs=bs)
+                    learner_lr=learner_lr, n_epochs=n_epochs, bs=bs,
+                    use_cuda_graph=use_cuda_graph, mixed_precision=mixed_precision,
+                    amp_dtype=amp_dtype, checkpoint_every=checkpoint_every,
+                    accumulate_grad_batches=accumulate_grad_batches)
 
-        if logger is not None:
+        if logger is not None:  # flush only, so the writer can be reused by later fits
             self.writer.flush()
-            self.writer.close()
 
         return self
 
@@ -177,23 +504,48 @@ class DeepReisz:
         if not torch.is_tensor(T):
             T = torch.Tensor(T).to(self.device)
 
+        self._wait_for_checkpoints()
+
         if model == 'avg':
-            preds = np.array([torch.load(os.path.join(self.model_dir,
-                                                      "epoch{}".format(i)))(T).cpu().data.numpy()
-                              for i in np.arange(burn_in, self.n_epochs)])
+            epochs = [i for i in self._saved_epochs if i >= burn_in]
+            if not epochs:
+                raise ValueError(
+                    "no saved epochs >= burn_in={}; fit with checkpoint_every=1 "
+                    "or lower burn_in to use model='avg'".format(burn_in))
             if alpha is None:
-                return np.mean(preds, axis=0).flatten()
+                # stream the per-epoch models and accumulate the mean online, so that
+                # peak memory does not grow with the number of epochs
+                with torch.inference_mode():
+                    acc = None
+                    for i in epochs:
+                        pred = self._load_learner(i)(T)
+                        acc = pred.clone() if acc is None else acc.add_(pred)
+                    return (acc / len(epochs)).cpu().numpy().flatten()
             else:
-                return np.mean(preds, axis=0).flatten(),\
-                    np.percentile(preds, 100 * alpha / 2, axis=0).flatten(),\
-                    np.percentile(preds, 100 * (1 - alpha / 2),
-                                  axis=0).flatten()
+                # percentiles need all per-epoch predictions; keep them on T's device
+                # and take the quantiles there, so only the three result vectors are
+                # ever moved back to the host
+                with torch.inference_mode():
+                    preds = torch.empty((len(epochs), T.shape[0]),
+                                        dtype=torch.float32, device=T.device)
+                    for row, i in enumerate(epochs):
+                        preds[row] = self._load_learner(i)(T).flatten()
+                    q = torch.tensor([alpha / 2, 1 - alpha / 2],
+                                     dtype=torch.float32, device=T.device)
+                    lo, hi = torch.quantile(preds, q, dim=0)
+                    return preds.mean(dim=0).cpu().numpy().flatten(),\
+                        lo.cpu().numpy().flatten(),\
+                        hi.cpu().numpy().flatten()
         if model == 'final':
-            return torch.load(os.path.join(self.model_dir,
-                                           "epoch{}".format(self.n_epochs - 1)))(T).cpu().data.numpy().flatten()
+            # with early stopping self.learner holds the best weights, so the final
+            # epoch's weights are served from the in-memory snapshot instead
+            net = self.learner if self._final_state is None \
+                else self._template_learner(self._final_state)
+            with torch.inference_mode():
+                return net(T).cpu().numpy().flatten()
         if model == 'earlystop':
-            return torch.load(os.path.join(self.model_dir,
-                                           "earlystop"))(T).cpu().data.numpy().flatten()
+            # after training with early stopping the best weights already live in self.learner
+            with torch.inference_mode():
+                return self.learner(T).cpu().numpy().flatten()
         if isinstance(model, int):
-            return torch.load(os.path.join(self.model_dir,
-                                           "epoch{}".format(model)))(T).cpu().data.numpy().flatten()
+            return self._load_learner(model)(T).cpu().data.numpy().flatten()